@@ -1,6 +1,12 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, create_engine
+from sqlalchemy import (
+    Column, Integer, Float, String, Date, DateTime, ForeignKey, Index, bindparam, create_engine, event, inspect, select,
+    text, update
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+from contextlib import contextmanager
 import datetime
 import os
 from dotenv import load_dotenv
@@ -15,29 +21,40 @@ class Ticker(Base):
     id = Column(Integer, primary_key=True)
     symbol = Column(String, unique=True, nullable=False)
     is_active = Column(Integer, default=1)
-    snapshots = relationship("VolatilitySnapshot", back_populates="ticker", cascade="all, delete-orphan")
+    snapshots = relationship("VolatilitySnapshot", back_populates="ticker", cascade="all, delete-orphan", lazy="raise")
     
     def __repr__(self):
         return f"<Ticker(symbol='{self.symbol}', is_active={self.is_active})>"
 
 class VolatilitySnapshot(Base):
     __tablename__ = 'volatility_snapshots'
+    __table_args__ = (
+        Index('ix_vs_ticker_ts', 'ticker_id', 'timestamp'),
+        Index('ix_vs_ticker_day', 'ticker_id', 'timestamp_day'),
+    )
     
     id = Column(Integer, primary_key=True)
     ticker_id = Column(Integer, ForeignKey('tickers.id'), nullable=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    # Materialized date buckets so day/week filters and group-bys hit an index instead of truncating timestamps
+    timestamp_day = Column(Date, index=True)
+    timestamp_week = Column(Date, index=True)
     spot_price = Column(Float, nullable=False)
     risk_free_rate = Column(Float, nullable=False)
     dividend_yield = Column(Float, nullable=False)
     
-    ticker = relationship("Ticker", back_populates="snapshots")
-    data_points = relationship("VolatilityDataPoint", back_populates="snapshot", cascade="all, delete-orphan")
+    ticker = relationship("Ticker", back_populates="snapshots", lazy="raise_on_sql")
+    # Lazy access raises; callers that iterate snapshots should add .options(selectinload(VolatilitySnapshot.data_points))
+    data_points = relationship("VolatilityDataPoint", back_populates="snapshot", cascade="all, delete-orphan", lazy="raise")
     
     def __repr__(self):
-        return f"<VolatilitySnapshot(ticker='{self.ticker.symbol}', timestamp='{self.timestamp}')>"
+        return f"<VolatilitySnapshot(ticker_id={self.ticker_id}, timestamp='{self.timestamp}')>"
 
 class VolatilityDataPoint(Base):
     __tablename__ = 'volatility_data_points'
+    __table_args__ = (
+        Index('ix_vdp_snapshot', 'snapshot_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     snapshot_id = Column(Integer, ForeignKey('volatility_snapshots.id'), nullable=False)
@@ -52,19 +69,135 @@ class VolatilityDataPoint(Base):
     def __repr__(self):
         return f"<VolatilityDataPoint(strike={self.strike}, expiration='{self.expiration_date}', iv={self.implied_volatility})>"
 
+def timestamp_buckets(timestamp):
+    """Get the (day, week starting Monday) buckets stored alongside a snapshot timestamp"""
+    day = timestamp.date()
+    return day, day - datetime.timedelta(days=day.weekday())
+
+def create_db_engine(bulk=False):
+    """Create a database engine based on environment configuration.
+
+    With bulk=True, returns a private in-memory SQLite engine for staging bulk writes.
+    """
+    db_url = 'sqlite://' if bulk else os.getenv('DATABASE_URL', 'sqlite:///volatility_surface.db')
+
+    # Rows per multi-VALUES INSERT page (psycopg2 values_plus_batch, or RETURNING inserts); plain executemany
+    # inserts, like SQLite's data-point insert, don't page. SQLAlchemy also caps each page's bound parameters
+    page_size = int(os.getenv('DB_INSERT_PAGE_SIZE', '1000'))
+
+    connect_args = {}
+    if db_url.startswith('sqlite'):
+        # Pooled connections get handed to both Streamlit and scheduler threads
+        connect_args['check_same_thread'] = False
+
+    if bulk:
+        # A single shared connection, otherwise every pooled connection would see its own empty database
+        return create_engine(db_url, insertmanyvalues_page_size=page_size, connect_args=connect_args, poolclass=StaticPool)
+
+    dialect_args = {}
+    if make_url(db_url).get_driver_name() == 'psycopg2':
+        # Multi-VALUES INSERTs (paged by insertmanyvalues_page_size) plus execute_batch for UPDATE/DELETE
+        dialect_args['executemany_mode'] = 'values_plus_batch'
+        dialect_args['executemany_batch_page_size'] = 500
+
+    engine = create_engine(db_url, insertmanyvalues_page_size=page_size, connect_args=connect_args, **dialect_args)
+
+    if db_url.startswith('sqlite'):
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+    return engine
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL journaling with NORMAL sync: one fsync-light append per commit, readers never block writers"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+# One engine (and connection pool) per process
+_engine = create_db_engine()
+_Session = sessionmaker(bind=_engine, expire_on_commit=False)
+
 def get_engine():
-    """Get database engine based on environment configuration."""
-    db_url = os.getenv('DATABASE_URL', 'sqlite:///volatility_surface.db')
-    return create_engine(db_url)
+    """Get the shared database engine"""
+    return _engine
 
 def get_session():
     """Get a new database session"""
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
+    return _Session()
+
+def begin_session():
+    """Get a new database session in a transaction that commits on exit and rolls back on error"""
+    return _Session.begin()
+
+@contextmanager
+def bulk_mode():
+    """Stage all database work in an in-memory copy of the SQLite database, writing it back to disk in one pass.
+
+    Intended for standalone backfill runs: the on-disk file is overwritten on exit, so writes made by other
+    processes or threads while the block runs are lost. If the block raises, the staged changes are discarded.
+    """
+    if _engine.dialect.name != 'sqlite':
+        raise ValueError('bulk_mode requires a SQLite database')
+
+    memory_engine = create_db_engine(bulk=True)
+    _copy_sqlite_database(_engine, memory_engine)
+    _Session.configure(bind=memory_engine)
+    try:
+        yield memory_engine
+        _copy_sqlite_database(memory_engine, _engine)
+    finally:
+        _Session.configure(bind=_engine)
+        memory_engine.dispose()
+
+def _copy_sqlite_database(source_engine, dest_engine):
+    """Copy one SQLite database over another with the sqlite3 online backup API"""
+    source = source_engine.raw_connection()
+    dest = dest_engine.raw_connection()
+    try:
+        source.driver_connection.backup(dest.driver_connection)
+    finally:
+        dest.close()
+        source.close()
 
 def init_db():
     """Initialize the database, creating tables if they don't exist"""
     engine = get_engine()
-    Base.metadata.create_all(engine) 
+    Base.metadata.create_all(engine)
+    _add_missing_snapshot_columns(engine)
+    _create_missing_indexes(engine)
+
+def _add_missing_snapshot_columns(engine):
+    """Add timestamp bucket columns to snapshot tables created before they existed"""
+    existing = {column['name'] for column in inspect(engine).get_columns('volatility_snapshots')}
+    missing = [name for name in ('timestamp_day', 'timestamp_week') if name not in existing]
+
+    if not missing:
+        return
+
+    snapshots = VolatilitySnapshot.__table__
+    with engine.begin() as conn:
+        for name in missing:
+            conn.execute(text(f'ALTER TABLE volatility_snapshots ADD COLUMN {name} DATE'))
+
+        # Backfill existing rows in Python, so the bucketing matches new saves without dialect-specific date functions
+        rows = [
+            dict(zip(('b_id', 'b_day', 'b_week'), (snapshot_id, *timestamp_buckets(timestamp))))
+            for snapshot_id, timestamp in conn.execute(
+                select(snapshots.c.id, snapshots.c.timestamp).where(snapshots.c.timestamp_day.is_(None))
+            )
+        ]
+        if rows:
+            conn.execute(
+                update(snapshots).where(snapshots.c.id == bindparam('b_id'))
+                .values(timestamp_day=bindparam('b_day'), timestamp_week=bindparam('b_week')),
+                rows
+            )
 
+def _create_missing_indexes(engine):
+    """Create model indexes missing from tables that already existed, which create_all leaves alone"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
@@ -1,38 +1,71 @@
-from database.models import Ticker, VolatilitySnapshot, VolatilityDataPoint, get_session
+from database.models import Ticker, VolatilitySnapshot, VolatilityDataPoint, get_session, begin_session, timestamp_buckets
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import postgresql, sqlite
 import pandas as pd
 import datetime
 
-def get_or_create_ticker(symbol):
-    """Get a ticker from the database or create it if it doesn't exist"""
-    session = get_session()
-    try:
-        ticker = session.query(Ticker).filter_by(symbol=symbol).first()
-        
-        if not ticker:
+# DataFrame column -> volatility_data_points column
+DATA_POINT_COLUMNS = {
+    'strike': 'strike',
+    'expirationDate': 'expiration_date',
+    'daysToExpiration': 'days_to_expiration',
+    'timeToExpiration': 'time_to_expiration',
+    'impliedVolatility': 'implied_volatility'
+}
+
+# Dialects supporting INSERT ... ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+def _get_or_create_ticker_id(session, symbol):
+    """Get a ticker's ID within an open session, inserting the ticker if it doesn't exist"""
+    select_id = select(Ticker.id).filter_by(symbol=symbol)
+    ticker_id = session.execute(select_id).scalar()
+    
+    if ticker_id is None:
+        dialect = session.bind.dialect
+        upsert = UPSERT_INSERTS.get(dialect.name)
+        
+        if upsert is None:
             ticker = Ticker(symbol=symbol)
             session.add(ticker)
-            session.commit()
-            # Get the ID of the newly created ticker
-            ticker_id = ticker.id
-            session.close()
-            # Create a new session and fetch the ticker to avoid detached instance errors
-            session = get_session()
-            ticker = session.query(Ticker).filter_by(id=ticker_id).first()
+            session.flush()
+            return ticker.id
         
-        return ticker
-    finally:
-        session.close()
+        # INSERT ... ON CONFLICT DO NOTHING is atomic against the unique symbol index
+        stmt = upsert(Ticker).values(symbol=symbol).on_conflict_do_nothing(index_elements=['symbol'])
+        if dialect.insert_returning:
+            ticker_id = session.execute(stmt.returning(Ticker.id)).scalar()
+        else:
+            session.execute(stmt)
+        
+        # Nothing returned: RETURNING unsupported, or another writer inserted the symbol first
+        if ticker_id is None:
+            ticker_id = session.execute(select_id).scalar_one()
+    
+    return ticker_id
+
+def get_or_create_ticker(symbol):
+    """Get a ticker's ID from the database, creating the ticker if it doesn't exist"""
+    with begin_session() as session:
+        return _get_or_create_ticker_id(session, symbol)
 
 def save_volatility_snapshot(ticker_symbol, spot_price, risk_free_rate, dividend_yield, options_df):
-    """Save a volatility surface snapshot to the database"""
-    session = get_session()
-    try:
+    """Save a volatility surface snapshot to the database in a single transaction"""
+    with begin_session() as session:
         # Get or create ticker
-        ticker = get_or_create_ticker(ticker_symbol)
+        ticker_id = _get_or_create_ticker_id(session, ticker_symbol)
         
         # Create snapshot
+        timestamp = datetime.datetime.utcnow()
+        timestamp_day, timestamp_week = timestamp_buckets(timestamp)
         snapshot = VolatilitySnapshot(
-            ticker_id=ticker.id,
+            ticker_id=ticker_id,
+            timestamp=timestamp,
+            timestamp_day=timestamp_day,
+            timestamp_week=timestamp_week,
             spot_price=spot_price,
             risk_free_rate=risk_free_rate,
             dividend_yield=dividend_yield
@@ -42,25 +75,17 @@ def save_volatility_snapshot(ticker_symbol, spot_price, risk_free_rate, dividend
         session.flush()  # Get the ID without committing
         snapshot_id = snapshot.id
         
-        # Add data points
-        for _, row in options_df.iterrows():
-            data_point = VolatilityDataPoint(
-                snapshot_id=snapshot_id,
-                strike=row['strike'],
-                expiration_date=row['expirationDate'],
-                days_to_expiration=row['daysToExpiration'],
-                time_to_expiration=row['timeToExpiration'],
-                implied_volatility=row['impliedVolatility']
-            )
-            session.add(data_point)
-        
-        session.commit()
-        return snapshot_id
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()
+        # Add data points in a single executemany INSERT, read straight off the column arrays
+        columns = list(DATA_POINT_COLUMNS.values())
+        rows = [
+            dict(zip(columns, values), snapshot_id=snapshot_id)
+            for values in options_df[list(DATA_POINT_COLUMNS)].itertuples(index=False, name=None)
+        ]
+
+        if rows:
+            session.execute(VolatilityDataPoint.__table__.insert(), rows)
+
+    return snapshot_id
 
 def get_active_tickers():
     """Get all active tickers from the database"""
@@ -89,76 +114,88 @@ def set_ticker_active(symbol, active=True):
     finally:
         session.close()
 
+def set_tickers_inactive_bulk(symbols):
+    """Deactivate several tickers in a single UPDATE, returning the number of tickers changed"""
+    if not symbols:
+        return 0
+    
+    with begin_session() as session:
+        result = session.execute(
+            update(Ticker).where(Ticker.symbol.in_(symbols)).values(is_active=0)
+        )
+        return result.rowcount
+
 def get_snapshot_timerange(ticker_symbol):
     """Get the earliest and latest snapshot timestamps for a ticker"""
     session = get_session()
     try:
-        ticker = session.query(Ticker).filter_by(symbol=ticker_symbol).first()
-        
-        if not ticker:
-            return None, None
-        
-        earliest = session.query(VolatilitySnapshot.timestamp)\
-            .filter_by(ticker_id=ticker.id)\
-            .order_by(VolatilitySnapshot.timestamp.asc())\
-            .first()
-        
-        latest = session.query(VolatilitySnapshot.timestamp)\
-            .filter_by(ticker_id=ticker.id)\
-            .order_by(VolatilitySnapshot.timestamp.desc())\
-            .first()
+        earliest, latest = session.execute(
+            select(func.min(VolatilitySnapshot.timestamp), func.max(VolatilitySnapshot.timestamp))
+            .join(Ticker)
+            .where(Ticker.symbol == ticker_symbol)
+        ).one()
         
         if earliest and latest:
-            return earliest[0], latest[0]
+            return earliest, latest
         return None, None
     finally:
         session.close()
 
-def get_snapshots_in_timerange(ticker_symbol, start_time, end_time):
-    """Get all snapshots for a ticker within a time range"""
+def iter_snapshots_in_timerange(ticker_symbol, start_time, end_time, batch_size=1000):
+    """Yield the snapshots for a ticker within a time range one at a time, streaming their data points"""
     session = get_session()
     try:
-        ticker = session.query(Ticker).filter_by(symbol=ticker_symbol).first()
-        
-        if not ticker:
-            return []
-        
-        snapshots = session.query(VolatilitySnapshot)\
-            .filter_by(ticker_id=ticker.id)\
-            .filter(VolatilitySnapshot.timestamp >= start_time)\
-            .filter(VolatilitySnapshot.timestamp <= end_time)\
-            .order_by(VolatilitySnapshot.timestamp.asc())\
-            .all()
+        in_range = (
+            Ticker.symbol == ticker_symbol,
+            VolatilitySnapshot.timestamp >= start_time,
+            VolatilitySnapshot.timestamp <= end_time
+        )
+        snapshot_order = (VolatilitySnapshot.timestamp.asc(), VolatilitySnapshot.id.asc())
+        
+        snapshots = session.execute(
+            select(
+                VolatilitySnapshot.id,
+                VolatilitySnapshot.timestamp,
+                VolatilitySnapshot.spot_price,
+                VolatilitySnapshot.risk_free_rate,
+                VolatilitySnapshot.dividend_yield
+            ).join(Ticker).where(*in_range).order_by(*snapshot_order)
+        ).all()
+        
+        if not snapshots:
+            return
+        
+        # Data points arrive in snapshot order, so each snapshot's rows form one contiguous run. The two queries
+        # are separate statements, so a snapshot saved in between can show up here; bound the ids and skip its rows
+        snapshot_ids = {snapshot.id for snapshot in snapshots}
+        data_points = iter(session.execute(
+            select(
+                VolatilityDataPoint.snapshot_id,
+                *(getattr(VolatilityDataPoint, column) for column in DATA_POINT_COLUMNS.values())
+            ).join(VolatilitySnapshot).join(Ticker)
+            .where(*in_range, VolatilitySnapshot.id <= max(snapshot_ids)).order_by(*snapshot_order)
+            .execution_options(yield_per=batch_size)
+        ))
+        pending = next(data_points, None)
         
-        result = []
         for snapshot in snapshots:
-            data_points = session.query(VolatilityDataPoint)\
-                .filter_by(snapshot_id=snapshot.id)\
-                .all()
-            
-            # Convert to DataFrame format
-            df_data = []
-            for dp in data_points:
-                df_data.append({
-                    'strike': dp.strike,
-                    'expirationDate': dp.expiration_date,
-                    'daysToExpiration': dp.days_to_expiration,
-                    'timeToExpiration': dp.time_to_expiration,
-                    'impliedVolatility': dp.implied_volatility
-                })
+            rows = []
+            while pending is not None and (pending.snapshot_id == snapshot.id or pending.snapshot_id not in snapshot_ids):
+                if pending.snapshot_id == snapshot.id:
+                    rows.append(pending[1:])
+                pending = next(data_points, None)
             
-            options_df = pd.DataFrame(df_data)
-            
-            result.append({
+            yield {
                 'id': snapshot.id,
                 'timestamp': snapshot.timestamp,
                 'spot_price': snapshot.spot_price,
                 'risk_free_rate': snapshot.risk_free_rate,
                 'dividend_yield': snapshot.dividend_yield,
-                'options_df': options_df
-            })
-        
-        return result
+                'options_df': pd.DataFrame(rows, columns=list(DATA_POINT_COLUMNS))
+            }
     finally:
-        session.close() 
+        session.close()
 
+def get_snapshots_in_timerange(ticker_symbol, start_time, end_time):
+    """Get all snapshots for a ticker within a time range"""
+    return list(iter_snapshots_in_timerange(ticker_symbol, start_time, end_time))
@@ -1,22 +1,19 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import timedelta, datetime
-from scipy.stats import norm
-from scipy.optimize import brentq
-from scipy.interpolate import griddata
-import plotly.graph_objects as go
+from datetime import datetime
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import sys
 from dotenv import load_dotenv
 import streamlit as st
 from database.models import init_db
 from database.operations import (
-    get_active_tickers, set_ticker_active, get_or_create_ticker,
+    get_active_tickers, set_tickers_inactive_bulk, get_or_create_ticker,
     save_volatility_snapshot, get_snapshot_timerange, get_snapshots_in_timerange
 )
 from utils.volatility import calculate_implied_volatility
+from utils.surface import interpolate_surface, surface_grid
 from utils.server import start_server, stop_server
 
 # Load dat db and env variables
@@ -51,34 +48,273 @@ def cleanup():
 import atexit
 atexit.register(cleanup)
 
-st.title('Implied Volatility Surface')
+# Shared surface figure layout
+SURFACE_CAMERA = dict(eye=dict(x=1.5, y=1.5, z=1.2))
+SURFACE_MARGIN = dict(l=65, r=50, b=65, t=90)
+
+# yfinance and Plotly are imported where they're first used, so the page starts painting before they load
+
+# yfinance lookups are memoized so widget-driven reruns don't refetch unchanged market data
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_options(ticker_symbol):
+    import yfinance as yf
+    return yf.Ticker(ticker_symbol).options
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_chain(ticker_symbol, exp):
+    import yfinance as yf
+    return yf.Ticker(ticker_symbol).option_chain(exp).calls[['strike', 'bid', 'ask']]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_spot(ticker_symbol):
+    import yfinance as yf
+    spot_history = yf.Ticker(ticker_symbol).history(period='5d')
+    if spot_history.empty:
+        return None
+    return spot_history['Close'].iloc[-1]
+
+# Decoded snapshots are memoized so slider moves and playback reruns don't go back to the database;
+# the range is passed as ISO strings to keep the cache key simple. latest_iso is the ticker's newest snapshot
+# time: it only keys the cache, so a new save or scheduler write misses instead of serving the old list
+@st.cache_data(ttl=600, show_spinner=False)
+def _load_snapshots(ticker_symbol, start_iso, end_iso, latest_iso):
+    return get_snapshots_in_timerange(
+        ticker_symbol, datetime.fromisoformat(start_iso), datetime.fromisoformat(end_iso)
+    )
 
-# Create tabs for different views
-tab1, tab2, tab3, tab4 = st.tabs(["Live View", "Historical View", "Ticker Management", "Playback"])
+# Fetching and pricing are keyed only on the inputs that change them, so display toggles reuse the result
+@st.cache_data(ttl=60, show_spinner='Calculating implied volatility...')
+def _compute_iv_surface(ticker_symbol, r, q, min_pct, max_pct):
+    today = pd.Timestamp('today').normalize()
 
-with tab1:
-    st.header("Black-Scholes Implied Volatility Surface")
-    
-    def bs_call_price(S, K, T, r, sigma, q=0):
-        d1 = (np.log(S / K) + (r - q + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-        d2 = d1 - sigma * np.sqrt(T)
-        call_price = S * np.exp(-q * T) * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-        return call_price
+    try:
+        expirations = _fetch_options(ticker_symbol)
+    except Exception as e:
+        raise RuntimeError(f'Error fetching options for {ticker_symbol}: {e}') from e
+
+    exp_ts = pd.to_datetime(list(expirations))
+    exp_dates = exp_ts[exp_ts > today + pd.Timedelta(days=7)]
 
-    def implied_volatility(price, S, K, T, r, q=0):
-        if T <= 0 or price <= 0:
-            return np.nan
+    if exp_dates.empty:
+        raise ValueError(f'No available option expiration dates for {ticker_symbol}.')
 
-        def objective_function(sigma):
-            return bs_call_price(S, K, T, r, sigma, q) - price
+    frames = []
 
+    # Chains are independent network calls, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=min(16, len(exp_dates))) as executor:
+        futures = [
+            (exp_date, executor.submit(_fetch_chain, ticker_symbol, exp))
+            for exp_date, exp in zip(exp_dates, exp_dates.strftime('%Y-%m-%d'))
+        ]
+
+    for exp_date, future in futures:
         try:
-            implied_vol = brentq(objective_function, 1e-6, 5)
-        except (ValueError, RuntimeError):
-            implied_vol = np.nan
+            calls = future.result()
+        except Exception as e:
+            st.warning(f'Failed to fetch option chain for {exp_date.date()}: {e}')
+            continue
+
+        calls = calls.loc[:, ['strike', 'bid', 'ask']].query('bid > 0 and ask > 0')
+        calls['expirationDate'] = exp_date
+        calls['mid'] = (calls['bid'] + calls['ask']) * 0.5
+        frames.append(calls)
 
-        return implied_vol
+    options_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if options_df.empty:
+        raise ValueError('No option data available after filtering.')
+
+    try:
+        spot_price = _fetch_spot(ticker_symbol)
+    except Exception as e:
+        raise RuntimeError(f'An error occurred while fetching spot price data: {e}') from e
+    if spot_price is None:
+        raise ValueError(f'Failed to retrieve spot price data for {ticker_symbol}.')
+
+    options_df['daysToExpiration'] = (options_df['expirationDate'] - today).dt.days
+    options_df['timeToExpiration'] = options_df['daysToExpiration'] / 365
+
+    options_df = options_df[
+        (options_df['strike'] >= spot_price * (min_pct / 100)) &
+        (options_df['strike'] <= spot_price * (max_pct / 100))
+    ]
+
+    options_df.reset_index(drop=True, inplace=True)
+
+    # Same solve as scheduler snapshots, bisection fallback included
+    options_df = calculate_implied_volatility(options_df, spot_price, r, q).dropna(subset=['impliedVolatility'])
+
+    if options_df.empty:
+        raise ValueError('No option data available after filtering.')
+
+    return options_df, spot_price
+
+# Interpolated playback surfaces depend only on the data selection, not on colors or frame timing
+@st.cache_data(ttl=600, show_spinner='Preparing playback frames...')
+def _prepare_frames(ticker_symbol, start_iso, end_iso, latest_iso, y_column):
+    snapshots = _load_snapshots(ticker_symbol, start_iso, end_iso, latest_iso)
+
+    # One grid spanning every snapshot, so frames only differ in Z
+    all_X = np.concatenate([s['options_df']['timeToExpiration'].values for s in snapshots])
+    all_Y = np.concatenate([s['options_df'][y_column].values for s in snapshots])
+
+    if len(all_X) == 0:
+        return None, None, []
+
+    T, K = surface_grid(all_X, all_Y)
+
+    frame_points = [
+        (options_df['timeToExpiration'].values, options_df[y_column].values, options_df['impliedVolatility'].values)
+        for options_df in (s['options_df'] for s in snapshots)
+        if len(options_df) > 0
+    ]
+
+    # Frames are independent and the NumPy/SciPy work releases the GIL, so interpolate them on a thread pool
+    with ThreadPoolExecutor() as executor:
+        surfaces = list(executor.map(lambda points: interpolate_surface(*points, T, K), frame_points))
+
+    return T, K, surfaces
+
+# The assembled figure is cached as plain data, so reruns that don't change playback settings skip
+# rebuilding every frame. Each color and duration combination is its own multi-MB entry, so only the most
+# recent few are kept; the interpolation underneath stays cached in _prepare_frames
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def _build_playback_figure(ticker_symbol, start_iso, end_iso, latest_iso, y_column, y_label, colorscale,
+                           frame_duration, transition_duration):
+    import plotly.graph_objects as go
+
+    T, K, surfaces = _prepare_frames(ticker_symbol, start_iso, end_iso, latest_iso, y_column)
+
+    if not surfaces:
+        return None
+
+    # Frames only restyle z on the base trace; the shared grid and styling are serialized once
+    frames = [
+        go.Frame(data=[go.Surface(z=Zi)], name=f"frame_{i}", traces=[0])
+        for i, Zi in enumerate(surfaces)
+    ]
+
+    # Create figure with first frame data
+    fig = go.Figure(
+        data=[go.Surface(
+            x=T, y=K, z=surfaces[0],
+            connectgaps=False,
+            colorscale=colorscale.lower(),
+            colorbar_title='Implied Volatility (%)'
+        )],
+        frames=frames
+    )
+
+    # Format timestamps
+    slider_labels = [
+        s["timestamp"].strftime("%H:%M:%S")
+        for s in _load_snapshots(ticker_symbol, start_iso, end_iso, latest_iso)
+    ]
+
+    # animation controls
+    fig.update_layout(
+        title=f'IV Surface Evolution for {ticker_symbol}',
+        scene=dict(
+            xaxis_title='Time to Expiration (years)',
+            yaxis_title=y_label,
+            zaxis_title='Implied Volatility (%)',
+            camera=SURFACE_CAMERA
+        ),
+        updatemenus=[
+            {
+                "type": "buttons",
+                "buttons": [
+                    {
+                        "label": "Play",
+                        "method": "animate",
+                        "args": [
+                            None, 
+                            {
+                                "frame": {"duration": frame_duration, "redraw": True},
+                                "fromcurrent": True,
+                                "transition": {"duration": transition_duration, "easing": "cubic-in-out"}
+                            }
+                        ]
+                    },
+                    {
+                        "label": "Pause",
+                        "method": "animate",
+                        "args": [
+                            [None], 
+                            {
+                                "frame": {"duration": 0, "redraw": False},
+                                "mode": "immediate",
+                                "transition": {"duration": 0}
+                            }
+                        ]
+                    }
+                ],
+                "direction": "left",
+                "pad": {"r": 10, "t": 10},
+                "showactive": True,
+                "type": "buttons",
+                "x": 0.1,
+                "y": 0,
+                "xanchor": "right",
+                "yanchor": "top"
+            }
+        ],
+        sliders=[
+            {
+                "active": 0,
+                "yanchor": "top",
+                "xanchor": "left",
+                "currentvalue": {
+                    "font": {"size": 12},
+                    "prefix": "Timestamp: ",
+                    "visible": True,
+                    "xanchor": "right"
+                },
+                "transition": {"duration": transition_duration, "easing": "cubic-in-out"},
+                "pad": {"b": 10, "t": 50},
+                "len": 0.9,
+                "x": 0.1,
+                "y": 0,
+                "steps": [
+                    {
+                        "args": [
+                            [f"frame_{i}"],
+                            {
+                                "frame": {"duration": frame_duration, "redraw": True},
+                                "mode": "immediate",
+                                "transition": {"duration": transition_duration}
+                            }
+                        ],
+                        "label": slider_labels[i],
+                        "method": "animate"
+                    }
+                    for i in range(len(frames))
+                ]
+            }
+        ],
+        autosize=False,
+        width=900,
+        height=800,
+        margin=SURFACE_MARGIN
+    )
+
+    return fig.to_dict()
+
+# The standalone HTML export is only rendered once a download is requested
+@st.cache_data(ttl=600, max_entries=2, show_spinner='Rendering playback HTML...')
+def _build_playback_html(*figure_args):
+    import plotly.io as pio
+
+    return pio.to_html(_build_playback_figure(*figure_args))
+
+st.title('Implied Volatility Surface')
+
+# Create tabs for different views
+tab1, tab2, tab3, tab4 = st.tabs(["Live View", "Historical View", "Ticker Management", "Playback"])
 
+with tab1:
+    st.header("Black-Scholes Implied Volatility Surface")
+    
     st.sidebar.header('Model Parameters')
     st.sidebar.write('Adjust the parameters for the Black-Scholes model.')
 
@@ -151,150 +387,73 @@ with tab1:
         st.sidebar.error('Minimum percentage must be less than maximum percentage.')
         st.stop()
 
-    ticker = yf.Ticker(ticker_symbol)
-
-    today = pd.Timestamp('today').normalize()
-
     try:
-        expirations = ticker.options
+        options_df, spot_price = _compute_iv_surface(
+            ticker_symbol, risk_free_rate, dividend_yield, min_strike_pct, max_strike_pct
+        )
     except Exception as e:
-        st.error(f'Error fetching options for {ticker_symbol}: {e}')
-        st.stop()
+        st.error(str(e))
+        options_df = None
 
-    exp_dates = [pd.Timestamp(exp) for exp in expirations if pd.Timestamp(exp) > today + timedelta(days=7)]
-
-    if not exp_dates:
-        st.error(f'No available option expiration dates for {ticker_symbol}.')
-    else:
-        option_data = []
+    if options_df is not None:
+        import plotly.graph_objects as go
 
-        for exp_date in exp_dates:
-            try:
-                opt_chain = ticker.option_chain(exp_date.strftime('%Y-%m-%d'))
-                calls = opt_chain.calls
-            except Exception as e:
-                st.warning(f'Failed to fetch option chain for {exp_date.date()}: {e}')
-                continue
-
-            calls = calls[(calls['bid'] > 0) & (calls['ask'] > 0)]
-
-            for index, row in calls.iterrows():
-                strike = row['strike']
-                bid = row['bid']
-                ask = row['ask']
-                mid_price = (bid + ask) / 2
-
-                option_data.append({
-                    'expirationDate': exp_date,
-                    'strike': strike,
-                    'bid': bid,
-                    'ask': ask,
-                    'mid': mid_price
-                })
-
-        if not option_data:
-            st.error('No option data available after filtering.')
+        # Only the cheap display steps below rerun when the Y-axis selection changes
+        if y_axis_option == 'Strike Price ($)':
+            Y = options_df['strike'].values
+            y_label = 'Strike Price ($)'
         else:
-            options_df = pd.DataFrame(option_data)
+            Y = options_df['moneyness'].values
+            y_label = 'Moneyness (Strike / Spot)'
+
+        X = options_df['timeToExpiration'].values
+        Z = options_df['impliedVolatility'].values
+
+        T, K = surface_grid(X, Y)
+
+        # NaN cells outside the quoted region render as gaps
+        Zi = interpolate_surface(X, Y, Z, T, K)
+
+        fig = go.Figure(data=[go.Surface(
+            x=T, y=K, z=Zi,
+            connectgaps=False,
+            colorscale='Inferno',
+            colorbar_title='Implied Volatility (%)'
+        )])
+
+        fig.update_layout(
+            title=f'Implied Volatility Surface for {ticker_symbol} Options',
+            scene=dict(
+                xaxis_title='Time to Expiration (years)',
+                yaxis_title=y_label,
+                zaxis_title='Implied Volatility (%)'
+            ),
+            autosize=False,
+            width=900,
+            height=800,
+            margin=SURFACE_MARGIN
+        )
 
+        st.plotly_chart(fig)
+        
+        # Save snapshot if requested
+        if save_snapshot:
             try:
-                spot_history = ticker.history(period='5d')
-                if spot_history.empty:
-                    st.error(f'Failed to retrieve spot price data for {ticker_symbol}.')
-                    st.stop()
-                else:
-                    spot_price = spot_history['Close'].iloc[-1]
-            except Exception as e:
-                st.error(f'An error occurred while fetching spot price data: {e}')
-                st.stop()
-
-            options_df['daysToExpiration'] = (options_df['expirationDate'] - today).dt.days
-            options_df['timeToExpiration'] = options_df['daysToExpiration'] / 365
-
-            options_df = options_df[
-                (options_df['strike'] >= spot_price * (min_strike_pct / 100)) &
-                (options_df['strike'] <= spot_price * (max_strike_pct / 100))
-            ]
-
-            options_df.reset_index(drop=True, inplace=True)
-
-            with st.spinner('Calculating implied volatility...'):
-                options_df['impliedVolatility'] = options_df.apply(
-                    lambda row: implied_volatility(
-                        price=row['mid'],
-                        S=spot_price,
-                        K=row['strike'],
-                        T=row['timeToExpiration'],
-                        r=risk_free_rate,
-                        q=dividend_yield
-                    ), axis=1
+                snapshot_id = save_volatility_snapshot(
+                    ticker_symbol,
+                    spot_price,
+                    risk_free_rate,
+                    dividend_yield,
+                    options_df
                 )
-
-            options_df.dropna(subset=['impliedVolatility'], inplace=True)
-
-            options_df['impliedVolatility'] *= 100
-
-            options_df.sort_values('strike', inplace=True)
-
-            options_df['moneyness'] = options_df['strike'] / spot_price
-
-            if y_axis_option == 'Strike Price ($)':
-                Y = options_df['strike'].values
-                y_label = 'Strike Price ($)'
-            else:
-                Y = options_df['moneyness'].values
-                y_label = 'Moneyness (Strike / Spot)'
-
-            X = options_df['timeToExpiration'].values
-            Z = options_df['impliedVolatility'].values
-
-            ti = np.linspace(X.min(), X.max(), 50)
-            ki = np.linspace(Y.min(), Y.max(), 50)
-            T, K = np.meshgrid(ti, ki)
-
-            Zi = griddata((X, Y), Z, (T, K), method='linear')
-
-            Zi = np.ma.array(Zi, mask=np.isnan(Zi))
-
-            fig = go.Figure(data=[go.Surface(
-                x=T, y=K, z=Zi,
-                colorscale='Inferno',
-                colorbar_title='Implied Volatility (%)'
-            )])
-
-            fig.update_layout(
-                title=f'Implied Volatility Surface for {ticker_symbol} Options',
-                scene=dict(
-                    xaxis_title='Time to Expiration (years)',
-                    yaxis_title=y_label,
-                    zaxis_title='Implied Volatility (%)'
-                ),
-                autosize=False,
-                width=900,
-                height=800,
-                margin=dict(l=65, r=50, b=65, t=90)
-            )
-
-            st.plotly_chart(fig)
-            
-            # Save snapshot if requested
-            if save_snapshot:
-                try:
-                    snapshot_id = save_volatility_snapshot(
-                        ticker_symbol,
-                        spot_price,
-                        risk_free_rate,
-                        dividend_yield,
-                        options_df
-                    )
-                    st.success(f"Snapshot saved successfully (ID: {snapshot_id})")
-                    
-                    # Add ticker to active tickers if not already there
-                    if ticker_symbol not in active_tickers:
-                        get_or_create_ticker(ticker_symbol)
-                        st.info(f"Added {ticker_symbol} to active tickers")
-                except Exception as e:
-                    st.error(f"Error saving snapshot: {e}")
+                st.success(f"Snapshot saved successfully (ID: {snapshot_id})")
+                
+                # Add ticker to active tickers if not already there
+                if ticker_symbol not in active_tickers:
+                    get_or_create_ticker(ticker_symbol)
+                    st.info(f"Added {ticker_symbol} to active tickers")
+            except Exception as e:
+                st.error(f"Error saving snapshot: {e}")
 
 with tab2:
     st.header("Historical Volatility Surface View")
@@ -365,13 +524,17 @@ with tab2:
             )
             
             # Get snapshots
-            snapshots = get_snapshots_in_timerange(hist_ticker, selected_start_dt, selected_end_dt)
+            snapshots = _load_snapshots(
+                hist_ticker, selected_start_dt.isoformat(), selected_end_dt.isoformat(), end_time.isoformat()
+            )
             
             if not snapshots:
                 st.warning(f"No snapshots found for {hist_ticker} in the selected time range.")
             else:
                 st.success(f"Found {len(snapshots)} snapshots in the selected time range.")
                 
+                import plotly.graph_objects as go
+                
                 # Create a slider for selecting snapshots - handle case with only one snapshot
                 if len(snapshots) == 1:
                     # If there's only one snapshot, don't use a slider
@@ -406,15 +569,13 @@ with tab2:
 
                 # Create surface plot
                 if len(X) > 0 and len(Y) > 0 and len(Z) > 0:
-                    ti = np.linspace(X.min(), X.max(), 50)
-                    ki = np.linspace(Y.min(), Y.max(), 50)
-                    T, K = np.meshgrid(ti, ki)
+                    T, K = surface_grid(X, Y)
 
-                    Zi = griddata((X, Y), Z, (T, K), method='linear')
-                    Zi = np.ma.array(Zi, mask=np.isnan(Zi))
+                    Zi = interpolate_surface(X, Y, Z, T, K)
 
                     fig = go.Figure(data=[go.Surface(
                         x=T, y=K, z=Zi,
+                        connectgaps=False,
                         colorscale='Inferno',
                         colorbar_title='Implied Volatility (%)'
                     )])
@@ -429,7 +590,7 @@ with tab2:
                         autosize=False,
                         width=900,
                         height=800,
-                        margin=dict(l=65, r=50, b=65, t=90)
+                        margin=SURFACE_MARGIN
                     )
 
                     st.plotly_chart(fig)
@@ -456,73 +617,68 @@ with tab2:
                         )
                     
                     if play_animation:
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        animation_placeholder = st.empty()
+                        if hist_y_axis == 'Strike Price ($)':
+                            y_column = 'strike'
+                            y_label = 'Strike Price ($)'
+                        else:
+                            y_column = 'moneyness'
+                            y_label = 'Moneyness (Strike / Spot)'
                         
-                        for i, snapshot in enumerate(snapshots):
-                            # Update progress
-                            progress = int(100 * i / (len(snapshots) - 1))
-                            progress_bar.progress(progress)
-                            
-                            # Display timestamp
-                            status_text.write(f"Viewing snapshot from: {snapshot['timestamp']}")
-                            
-                            # Get data for current snapshot
-                            options_df = snapshot['options_df']
-                            
-                            if hist_y_axis == 'Strike Price ($)':
-                                Y = options_df['strike'].values
-                                y_label = 'Strike Price ($)'
-                            else:
-                                Y = options_df['moneyness'].values
-                                y_label = 'Moneyness (Strike / Spot)'
-
-                            X = options_df['timeToExpiration'].values
-                            Z = options_df['impliedVolatility'].values
-
-                            # Create surface plot
-                            if len(X) > 0 and len(Y) > 0 and len(Z) > 0:
-                                ti = np.linspace(X.min(), X.max(), 50)
-                                ki = np.linspace(Y.min(), Y.max(), 50)
-                                T, K = np.meshgrid(ti, ki)
-
-                                Zi = griddata((X, Y), Z, (T, K), method='linear')
-                                Zi = np.ma.array(Zi, mask=np.isnan(Zi))
-
-                                fig = go.Figure(data=[go.Surface(
-                                    x=T, y=K, z=Zi,
+                        # Same cached, shared-grid interpolation as the Playback tab
+                        T, K, frame_surfaces = _prepare_frames(
+                            hist_ticker, selected_start_dt.isoformat(), selected_end_dt.isoformat(),
+                            end_time.isoformat(), y_column
+                        )
+                        
+                        if frame_surfaces:
+                            # One figure with client-side frames that only swap z; the browser handles playback
+                            fig = go.Figure(
+                                data=[go.Surface(
+                                    x=T, y=K, z=frame_surfaces[0],
+                                    connectgaps=False,
                                     colorscale='Inferno',
                                     colorbar_title='Implied Volatility (%)'
-                                )])
-
-                                fig.update_layout(
-                                    title=f'Historical Implied Volatility Surface for {hist_ticker}',
-                                    scene=dict(
-                                        xaxis_title='Time to Expiration (years)',
-                                        yaxis_title=y_label,
-                                        zaxis_title='Implied Volatility (%)',
-                                        camera=dict(
-                                            eye=dict(x=1.5, y=1.5, z=1.2)
-                                        )
-                                    ),
-                                    autosize=False,
-                                    width=900,
-                                    height=800,
-                                    margin=dict(l=65, r=50, b=65, t=90)
-                                )
-
-                                animation_placeholder.plotly_chart(fig, key=f"hist_anim_frame_{i}")
-                                
-                                # Wait for animation speed
-                                import time
-                                time.sleep(animation_speed)
-                        
-                        # Complete progress bar
-                        progress_bar.progress(100)
+                                )],
+                                frames=[
+                                    go.Frame(data=[go.Surface(z=Zi)], name=str(i), traces=[0])
+                                    for i, Zi in enumerate(frame_surfaces)
+                                ]
+                            )
+
+                            fig.update_layout(
+                                title=f'Historical Implied Volatility Surface for {hist_ticker}',
+                                scene=dict(
+                                    xaxis_title='Time to Expiration (years)',
+                                    yaxis_title=y_label,
+                                    zaxis_title='Implied Volatility (%)',
+                                    camera=SURFACE_CAMERA
+                                ),
+                                updatemenus=[
+                                    {
+                                        "type": "buttons",
+                                        "buttons": [
+                                            {
+                                                "label": "Play",
+                                                "method": "animate",
+                                                "args": [
+                                                    None,
+                                                    {
+                                                        "frame": {"duration": int(animation_speed * 1000), "redraw": True},
+                                                        "fromcurrent": True
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }
+                                ],
+                                autosize=False,
+                                width=900,
+                                height=800,
+                                margin=SURFACE_MARGIN
+                            )
 
-                        # Display animation
-                        st.plotly_chart(fig, key="playback_animation")
+                            # Display animation
+                            st.plotly_chart(fig, key="hist_playback_animation")
 
 with tab3:
     st.header("Ticker Management")
@@ -538,6 +694,8 @@ with tab3:
     
     if add_ticker and new_ticker:
         try:
+            import yfinance as yf
+            
             # Validate ticker by fetching data
             ticker = yf.Ticker(new_ticker)
             info = ticker.info
@@ -559,16 +717,21 @@ with tab3:
     if not active_tickers:
         st.info("No active tickers found. Add some tickers above.")
     else:
-        st.write("Select tickers to deactivate:")
+        # A form only reruns the page on submit, and the unchecked tickers go out in one UPDATE
+        with st.form("deactivate_form"):
+            st.write("Select tickers to deactivate:")
+            
+            ticker_states = {
+                ticker: st.checkbox(ticker, value=True, key=f"active_{ticker}")
+                for ticker in active_tickers
+            }
+            submitted = st.form_submit_button("Apply")
         
-        for ticker in active_tickers:
-            if st.checkbox(ticker, value=True, key=f"active_{ticker}"):
-                # Keep ticker active
-                pass
-            else:
-                # Deactivate ticker
-                set_ticker_active(ticker, False)
-                st.success(f"Deactivated {ticker}")
+        if submitted:
+            to_deactivate = [ticker for ticker, keep in ticker_states.items() if not keep]
+            if to_deactivate:
+                set_tickers_inactive_bulk(to_deactivate)
+                st.success(f"Deactivated {', '.join(to_deactivate)}")
     
     st.subheader("Snapshot Schedule Configuration")
     
@@ -690,7 +853,9 @@ with tab4:
                 )
             
             # Get snapshots
-            snapshots = get_snapshots_in_timerange(anim_ticker, anim_start_dt, anim_end_dt)
+            snapshots = _load_snapshots(
+                anim_ticker, anim_start_dt.isoformat(), anim_end_dt.isoformat(), end_time.isoformat()
+            )
             
             if not snapshots:
                 st.warning(f"No snapshots found for {anim_ticker} in the selected time range.")
@@ -702,185 +867,25 @@ with tab4:
                 # Create animation
                 create_animation = st.button("Generate Playback", key="create_animation")
                 
+                if anim_y_axis == 'Strike Price ($)':
+                    y_column = 'strike'
+                    y_label = 'Strike Price ($)'
+                else:
+                    y_column = 'moneyness'
+                    y_label = 'Moneyness (Strike / Spot)'
+                
+                # Remember what was generated, so display-only changes (colors, durations) keep the playback up
+                playback_key = (
+                    anim_ticker, anim_start_dt.isoformat(), anim_end_dt.isoformat(), end_time.isoformat(), y_column
+                )
                 if create_animation:
-                    # Prepare data for animation
-                    frames = []
-                    
-                    # Progress bar for data preparation
-                    prep_progress = st.progress(0)
-                    prep_status = st.empty()
-                    
-                    for i, snapshot in enumerate(snapshots):
-                        # Update progress
-                        progress = int(100 * i / (len(snapshots) - 1))
-                        prep_progress.progress(progress)
-                        prep_status.write(f"Preparing frame {i+1}/{len(snapshots)}...")
-                        
-                        # Get data for current snapshot
-                        options_df = snapshot['options_df']
-                        
-                        if anim_y_axis == 'Strike Price ($)':
-                            Y = options_df['strike'].values
-                            y_label = 'Strike Price ($)'
-                        else:
-                            Y = options_df['moneyness'].values
-                            y_label = 'Moneyness (Strike / Spot)'
-
-                        X = options_df['timeToExpiration'].values
-                        Z = options_df['impliedVolatility'].values
-                        
-                        # Create surface for this frame
-                        if len(X) > 0 and len(Y) > 0 and len(Z) > 0:
-                            ti = np.linspace(X.min(), X.max(), 50)
-                            ki = np.linspace(Y.min(), Y.max(), 50)
-                            T, K = np.meshgrid(ti, ki)
-                            
-                            Zi = griddata((X, Y), Z, (T, K), method='linear')
-                            Zi = np.ma.array(Zi, mask=np.isnan(Zi))
-                            
-                            # Create frame
-                            frame = go.Frame(
-                                data=[go.Surface(
-                                    x=T, y=K, z=Zi,
-                                    colorscale=colorscale.lower(),
-                                    colorbar_title='Implied Volatility (%)',
-                                    showscale=(i == 0)  # Only show colorbar on first frame
-                                )],
-                                name=f"frame_{i}",
-                                traces=[0]
-                            )
-                            
-                            frames.append(frame)
-                    
-                    # Complete progress
-                    prep_progress.progress(100)
-                    prep_status.write("Playback preparation complete!")
+                    st.session_state.playback_key = playback_key
+                
+                if st.session_state.get('playback_key') == playback_key:
+                    figure_args = (*playback_key, y_label, colorscale, frame_duration, transition_duration)
+                    fig = _build_playback_figure(*figure_args)
                     
-                    if len(frames) > 0:
-                        # Create base figure with first frame data
-                        base_snapshot = snapshots[0]
-                        options_df = base_snapshot['options_df']
-                        
-                        if anim_y_axis == 'Strike Price ($)':
-                            Y = options_df['strike'].values
-                            y_label = 'Strike Price ($)'
-                        else:
-                            Y = options_df['moneyness'].values
-                            y_label = 'Moneyness (Strike / Spot)'
-
-                        X = options_df['timeToExpiration'].values
-                        Z = options_df['impliedVolatility'].values
-                        
-                        ti = np.linspace(X.min(), X.max(), 50)
-                        ki = np.linspace(Y.min(), Y.max(), 50)
-                        T, K = np.meshgrid(ti, ki)
-                        
-                        Zi = griddata((X, Y), Z, (T, K), method='linear')
-                        Zi = np.ma.array(Zi, mask=np.isnan(Zi))
-                        
-                        # Create figure
-                        fig = go.Figure(
-                            data=[go.Surface(
-                                x=T, y=K, z=Zi,
-                                colorscale=colorscale.lower(),
-                                colorbar_title='Implied Volatility (%)'
-                            )],
-                            frames=frames
-                        )
-                        
-                        # Format timestamps 
-                        slider_labels = [s["timestamp"].strftime("%H:%M:%S") for s in snapshots]
-                        
-                        # animation controls
-                        fig.update_layout(
-                            title=f'IV Surface Evolution for {anim_ticker}',
-                            scene=dict(
-                                xaxis_title='Time to Expiration (years)',
-                                yaxis_title=y_label,
-                                zaxis_title='Implied Volatility (%)',
-                                camera=dict(
-                                    eye=dict(x=1.5, y=1.5, z=1.2)
-                                )
-                            ),
-                            updatemenus=[
-                                {
-                                    "type": "buttons",
-                                    "buttons": [
-                                        {
-                                            "label": "Play",
-                                            "method": "animate",
-                                            "args": [
-                                                None, 
-                                                {
-                                                    "frame": {"duration": frame_duration, "redraw": True},
-                                                    "fromcurrent": True,
-                                                    "transition": {"duration": transition_duration, "easing": "cubic-in-out"}
-                                                }
-                                            ]
-                                        },
-                                        {
-                                            "label": "Pause",
-                                            "method": "animate",
-                                            "args": [
-                                                [None], 
-                                                {
-                                                    "frame": {"duration": 0, "redraw": False},
-                                                    "mode": "immediate",
-                                                    "transition": {"duration": 0}
-                                                }
-                                            ]
-                                        }
-                                    ],
-                                    "direction": "left",
-                                    "pad": {"r": 10, "t": 10},
-                                    "showactive": True,
-                                    "type": "buttons",
-                                    "x": 0.1,
-                                    "y": 0,
-                                    "xanchor": "right",
-                                    "yanchor": "top"
-                                }
-                            ],
-                            sliders=[
-                                {
-                                    "active": 0,
-                                    "yanchor": "top",
-                                    "xanchor": "left",
-                                    "currentvalue": {
-                                        "font": {"size": 12},
-                                        "prefix": "Timestamp: ",
-                                        "visible": True,
-                                        "xanchor": "right"
-                                    },
-                                    "transition": {"duration": transition_duration, "easing": "cubic-in-out"},
-                                    "pad": {"b": 10, "t": 50},
-                                    "len": 0.9,
-                                    "x": 0.1,
-                                    "y": 0,
-                                    "steps": [
-                                        {
-                                            "args": [
-                                                [f"frame_{i}"],
-                                                {
-                                                    "frame": {"duration": frame_duration, "redraw": True},
-                                                    "mode": "immediate",
-                                                    "transition": {"duration": transition_duration}
-                                                }
-                                            ],
-                                            "label": slider_labels[i],
-                                            "method": "animate"
-                                        }
-                                        for i in range(len(frames))
-                                    ]
-                                }
-                            ],
-                            autosize=False,
-                            width=900,
-                            height=800,
-                            margin=dict(l=65, r=50, b=65, t=90)
-                        )
-                        
-                        
+                    if fig is not None:
                         animation_container = st.container()
                         with animation_container:
                             st.plotly_chart(fig, key="playback_animation")
@@ -899,13 +904,17 @@ with tab4:
                         timestamp_df = pd.DataFrame(timestamp_data)
                         st.dataframe(timestamp_df, use_container_width=True)
                         
-                        # download link for them haters
-                        st.download_button(
-                            label="Download Playback HTML",
-                            data=fig.to_html(),
-                            file_name=f"{anim_ticker}_iv_surface_playback.html",
-                            mime="text/html"
-                        )
+                        # download link for them haters, rendered only once asked for
+                        if st.button("Prepare Playback HTML", key="prepare_playback_html"):
+                            st.session_state.playback_html_args = figure_args
+                        
+                        if st.session_state.get('playback_html_args') == figure_args:
+                            st.download_button(
+                                label="Download Playback HTML",
+                                data=_build_playback_html(*figure_args),
+                                file_name=f"{anim_ticker}_iv_surface_playback.html",
+                                mime="text/html"
+                            )
                     else:
                         st.error("Failed to create playback frames. Please try a different time range.")
 
@@ -1,13 +1,14 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-import yfinance as yf
 import pandas as pd
-from datetime import timedelta
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import logging
-import time
+import threading
 import os
 from database.operations import get_active_tickers, save_volatility_snapshot
-from database.models import init_db
+from database.models import init_db, get_engine
 from utils.volatility import calculate_implied_volatility
 
 # Configure logging
@@ -17,19 +18,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger('volatility_scheduler')
 
+# Tickers snapshotted concurrently, and the lock serializing their writes when SQLite is the backend
+TICKER_WORKERS = 4
+_db_write_lock = threading.Lock()
+
+def _fetch_calls(ticker, exp, min_strike, max_strike):
+    """Fetch one expiration's quoted calls within the strike range"""
+    calls = ticker.option_chain(exp).calls
+    
+    # Drop unquoted and out-of-range strikes up front so the IV solve only sees rows that are kept
+    return calls[
+        (calls['bid'] > 0) & (calls['ask'] > 0) &
+        (calls['strike'] >= min_strike) & (calls['strike'] <= max_strike)
+    ]
+
 def fetch_volatility_data(ticker_symbol, risk_free_rate, dividend_yield, min_strike_pct=80.0, max_strike_pct=120.0):
     """Fetch volatility data for a ticker"""
     logger.info(f"Fetching volatility data for {ticker_symbol}")
     
     try:
+        import yfinance as yf
+        
         ticker = yf.Ticker(ticker_symbol)
         today = pd.Timestamp('today').normalize()
         
         # Get expirations
         expirations = ticker.options
-        exp_dates = [pd.Timestamp(exp) for exp in expirations if pd.Timestamp(exp) > today + timedelta(days=7)]
+        exp_ts = pd.to_datetime(list(expirations))
+        exp_dates = exp_ts[exp_ts > today + pd.Timedelta(days=7)]
         
-        if not exp_dates:
+        if exp_dates.empty:
             logger.warning(f"No available option expiration dates for {ticker_symbol}")
             return None, None, None
         
@@ -40,51 +58,53 @@ def fetch_volatility_data(ticker_symbol, risk_free_rate, dividend_yield, min_str
             return None, None, None
         
         spot_price = spot_history['Close'].iloc[-1]
-        
-        # Get option data
-        option_data = []
-        for exp_date in exp_dates:
+        min_strike = spot_price * (min_strike_pct / 100)
+        max_strike = spot_price * (max_strike_pct / 100)
+        
+        # Get option data; chains are independent network calls, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=min(8, len(exp_dates))) as executor:
+            futures = [
+                executor.submit(_fetch_calls, ticker, exp, min_strike, max_strike)
+                for exp in exp_dates.strftime('%Y-%m-%d')
+            ]
+        
+        chains = []
+        for i, future in enumerate(futures):
             try:
-                opt_chain = ticker.option_chain(exp_date.strftime('%Y-%m-%d'))
-                calls = opt_chain.calls
-                
-                calls = calls[(calls['bid'] > 0) & (calls['ask'] > 0)]
-                
-                for index, row in calls.iterrows():
-                    strike = row['strike']
-                    bid = row['bid']
-                    ask = row['ask']
-                    mid_price = (bid + ask) / 2
-                    
-                    option_data.append({
-                        'expirationDate': exp_date,
-                        'strike': strike,
-                        'bid': bid,
-                        'ask': ask,
-                        'mid': mid_price
-                    })
+                chains.append((i, future.result()))
             except Exception as e:
-                logger.warning(f"Failed to fetch option chain for {exp_date.date()}: {e}")
+                logger.warning(f"Failed to fetch option chain for {exp_dates[i].date()}: {e}")
                 continue
         
-        if not option_data:
+        # Fill preallocated column arrays chain by chain, then build the frame once
+        n = sum(len(calls) for _, calls in chains)
+        if n == 0:
             logger.warning(f"No option data available after filtering for {ticker_symbol}")
             return None, None, None
         
-        # Create DataFrame
-        options_df = pd.DataFrame(option_data)
-        
-        # Calculate days to expiration
-        options_df['daysToExpiration'] = (options_df['expirationDate'] - today).dt.days
-        options_df['timeToExpiration'] = options_df['daysToExpiration'] / 365
-        
-        # Filter by strike price
-        options_df = options_df[
-            (options_df['strike'] >= spot_price * (min_strike_pct / 100)) &
-            (options_df['strike'] <= spot_price * (max_strike_pct / 100))
-        ]
-        
-        options_df.reset_index(drop=True, inplace=True)
+        strike = np.empty(n)
+        bid = np.empty(n)
+        ask = np.empty(n)
+        exp_idx = np.empty(n, dtype=np.int32)
+        offset = 0
+        for i, calls in chains:
+            end = offset + len(calls)
+            strike[offset:end] = calls['strike'].to_numpy()
+            bid[offset:end] = calls['bid'].to_numpy()
+            ask[offset:end] = calls['ask'].to_numpy()
+            exp_idx[offset:end] = i
+            offset = end
+        
+        days = (exp_dates - today).days.to_numpy()[exp_idx]
+        options_df = pd.DataFrame({
+            'expirationDate': exp_dates.take(exp_idx),
+            'strike': strike,
+            'bid': bid,
+            'ask': ask,
+            'mid': (bid + ask) / 2,
+            'daysToExpiration': days,
+            'timeToExpiration': days / 365
+        })
         
         # Calculate implied volatility
         options_df = calculate_implied_volatility(
@@ -106,6 +126,38 @@ def fetch_volatility_data(ticker_symbol, risk_free_rate, dividend_yield, min_str
         logger.error(f"Error fetching volatility data for {ticker_symbol}: {e}")
         return None, None, str(e)
 
+def _process_ticker(ticker_symbol, risk_free_rate, dividend_yield, min_strike_pct, max_strike_pct):
+    """Fetch and save one ticker's volatility surface snapshot"""
+    spot_price, options_df, error = fetch_volatility_data(
+        ticker_symbol, 
+        risk_free_rate, 
+        dividend_yield,
+        min_strike_pct,
+        max_strike_pct
+    )
+    
+    if error:
+        logger.error(f"Error fetching data for {ticker_symbol}: {error}")
+        return
+    
+    if spot_price is None or options_df is None or options_df.empty:
+        logger.warning(f"No valid data for {ticker_symbol}")
+        return
+    
+    # Save to database; SQLite allows a single writer, so serialize saves rather than hit "database is locked"
+    try:
+        with _db_write_lock if get_engine().dialect.name == 'sqlite' else nullcontext():
+            snapshot_id = save_volatility_snapshot(
+                ticker_symbol,
+                spot_price,
+                risk_free_rate,
+                dividend_yield,
+                options_df
+            )
+        logger.info(f"Saved snapshot {snapshot_id} for {ticker_symbol}")
+    except Exception as e:
+        logger.error(f"Error saving snapshot for {ticker_symbol}: {e}")
+
 def snapshot_job():
     """Job to take snapshots of volatility surfaces for all active tickers"""
     logger.info("Starting volatility surface snapshot job")
@@ -123,36 +175,15 @@ def snapshot_job():
     min_strike_pct = float(os.getenv('MIN_STRIKE_PCT', '80.0'))
     max_strike_pct = float(os.getenv('MAX_STRIKE_PCT', '120.0'))
     
-    # Take snapshots
-    for ticker_symbol in tickers:
-        spot_price, options_df, error = fetch_volatility_data(
-            ticker_symbol, 
-            risk_free_rate, 
-            dividend_yield,
-            min_strike_pct,
-            max_strike_pct
-        )
-        
-        if error:
-            logger.error(f"Error fetching data for {ticker_symbol}: {error}")
-            continue
-        
-        if spot_price is None or options_df is None or options_df.empty:
-            logger.warning(f"No valid data for {ticker_symbol}")
-            continue
-        
-        # Save to database
-        try:
-            snapshot_id = save_volatility_snapshot(
-                ticker_symbol,
-                spot_price,
-                risk_free_rate,
-                dividend_yield,
-                options_df
-            )
-            logger.info(f"Saved snapshot {snapshot_id} for {ticker_symbol}")
-        except Exception as e:
-            logger.error(f"Error saving snapshot for {ticker_symbol}: {e}")
+    # Take snapshots; tickers are network-bound, so overlap their fetches. The parallel IV kernel is not
+    # reentrant under every Numba threading layer, and implied_vol_jit serializes its launches across these threads
+    with ThreadPoolExecutor(max_workers=min(TICKER_WORKERS, len(tickers))) as executor:
+        list(executor.map(
+            lambda ticker_symbol: _process_ticker(
+                ticker_symbol, risk_free_rate, dividend_yield, min_strike_pct, max_strike_pct
+            ),
+            tickers
+        ))
 
 def start_scheduler():
     """Start the scheduler"""
@@ -183,9 +214,8 @@ if __name__ == "__main__":
     scheduler = start_scheduler()
     
     try:
-        # Keep the script running
-        while True:
-            time.sleep(1)
+        # Keep the script running; the scheduler works in its own thread
+        threading.Event().wait()
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown() 
 
@@ -1,6 +1,5 @@
 import os
 import logging
-import time
 import threading
 from utils.scheduler import start_scheduler, snapshot_job
 
@@ -37,8 +36,8 @@ def start_server():
 def run_server(scheduler, stop_event):
     """Run the server until the stop event is set"""
     try:
-        while not stop_event.is_set():
-            time.sleep(1)
+        # Block until shutdown instead of waking up every second to poll
+        stop_event.wait()
     except (KeyboardInterrupt, SystemExit):
         pass
     finally:
@@ -59,8 +58,7 @@ if __name__ == "__main__":
     
     try:
         # Keep the script running when executed directly
-        while True:
-            time.sleep(1)
+        stop_event.wait()
     except (KeyboardInterrupt, SystemExit):
         stop_server(scheduler, stop_event) 
 
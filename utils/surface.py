@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+
+def surface_grid(X, Y, n=50):
+    """Build an n x n (T, K) meshgrid spanning the given points"""
+    ti = np.linspace(X.min(), X.max(), n)
+    ki = np.linspace(Y.min(), Y.max(), n)
+    return np.meshgrid(ti, ki)
+
+def interpolate_surface(X, Y, Z, T, K):
+    """Linearly interpolate implied volatility points onto the (T, K) grid.
+
+    The points are pivoted onto their own (expiration x strike) lattice, gaps inside each expiration's
+    strike range are filled linearly, and the lattice is evaluated with a RegularGridInterpolator.
+    """
+    # scipy.interpolate is slow to import and only needed once there is a surface to draw
+    from scipy.interpolate import RegularGridInterpolator
+
+    lattice = pd.DataFrame({'x': X, 'y': Y, 'z': Z})\
+        .pivot_table(index='x', columns='y', values='z')\
+        .interpolate(method='index', axis=1, limit_area='inside')
+
+    rgi = RegularGridInterpolator(
+        (lattice.index.values, lattice.columns.values),
+        lattice.values,
+        method='linear',
+        bounds_error=False,
+        fill_value=np.nan
+    )
+    return rgi(np.stack([T.ravel(), K.ravel()], axis=-1)).reshape(T.shape)
@@ -1,48 +1,137 @@
+import math
+import threading
 import numpy as np
-from scipy.stats import norm
-from scipy.optimize import brentq
+from numba import njit, prange, types
 
+# 1 / sqrt(2 * pi), for the standard normal density
+INV_SQRT_2PI = 0.3989422804014327
 
-def bs_call_price(S, K, T, r, sigma, q=0):
-    """Calculate Black-Scholes call option price"""
-    d1 = (np.log(S / K) + (r - q + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
-    call_price = S * np.exp(-q * T) * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-    return call_price
+# Numba's workqueue threading layer (the only one without TBB or OpenMP installed) aborts the process when
+# parallel kernels are launched from more than one thread at once, so launches are serialized
+_kernel_lock = threading.Lock()
 
-def implied_volatility(price, S, K, T, r, q=0):
-    """Calculate implied volatility using the Black-Scholes model"""
-    if T <= 0 or price <= 0:
-        return np.nan
+# Read-only inputs, which also covers pandas' copy-on-write column views
+_READONLY_F8 = types.Array(types.float64, 1, 'C', readonly=True)
+_KERNEL_SIGNATURE = types.void(
+    _READONLY_F8, types.float64, _READONLY_F8, _READONLY_F8, types.float64, types.float64, types.float64[::1], types.int64
+)
 
-    def objective_function(sigma):
-        return bs_call_price(S, K, T, r, sigma, q) - price
+# fastmath minus the no-NaN/no-inf flags, so NaN outputs and overflowing steps behave
+@njit(
+    [_KERNEL_SIGNATURE],
+    parallel=True,
+    fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'},
+    cache=True
+)
+def _iv_kernel(prices, S, K, T, r, q, out, n_iter):
+    """Newton-Raphson implied volatility per option, fused into one parallel loop"""
+    for i in prange(K.shape[0]):
+        price = prices[i]
+        t = T[i]
+        out[i] = math.nan
+        if t <= 0.0 or price <= 0.0:
+            continue
 
-    try:
-        implied_vol = brentq(objective_function, 1e-6, 5)
-    except (ValueError, RuntimeError):
-        implied_vol = np.nan
+        log_sk = math.log(S / K[i])
+        sqrt_t = math.sqrt(t)
+        spot_disc = S * math.exp(-q * t)
+        strike_disc = K[i] * math.exp(-r * t)
+        sigma = min(max(math.sqrt(2.0 * abs(log_sk + (r - q) * t) / t), 0.1), 5.0)
 
-    return implied_vol
+        for _ in range(n_iter):
+            d1 = (log_sk + (r - q + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+            d2 = d1 - sigma * sqrt_t
+            price_model = (spot_disc * 0.5 * (1.0 + math.erf(d1 * 0.7071067811865475))
+                           - strike_disc * 0.5 * (1.0 + math.erf(d2 * 0.7071067811865475)))
+            diff = price_model - price
+            if abs(diff) < 1e-6:
+                out[i] = sigma
+                break
+
+            vega = spot_disc * math.exp(-0.5 * d1 * d1) * INV_SQRT_2PI * sqrt_t
+            if vega <= 1e-8:
+                break
+            sigma = min(max(sigma - diff / vega, 1e-6), 5.0)
+
+def implied_vol_jit(prices, S, K, T, r, q=0, n_iter=50):
+    """Calculate implied volatilities for arrays of call prices with the compiled Newton-Raphson kernel"""
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    K = np.ascontiguousarray(K, dtype=np.float64)
+    T = np.ascontiguousarray(T, dtype=np.float64)
+    out = np.empty(K.shape, dtype=np.float64)
+    with _kernel_lock:
+        _iv_kernel(prices, float(S), K, T, float(r), float(q), out, n_iter)
+    return out
+
+@njit(fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'}, cache=True)
+def _bs_call(S, K, T, r, sigma, q):
+    """Black-Scholes call price for a single option, with an erf-based normal CDF"""
+    sigma_sqrt_t = sigma * math.sqrt(T)
+    d1 = (math.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / sigma_sqrt_t
+    d2 = d1 - sigma_sqrt_t
+    return (S * math.exp(-q * T) * 0.5 * (1.0 + math.erf(d1 * 0.7071067811865475))
+            - K * math.exp(-r * T) * 0.5 * (1.0 + math.erf(d2 * 0.7071067811865475)))
+
+@njit(cache=True)
+def _bisect_kernel(prices, S, K, T, r, q, out, tol):
+    """Bisection implied volatility per option over [1e-6, 5], NaN where the price isn't bracketed"""
+    for i in range(K.shape[0]):
+        price = prices[i]
+        t = T[i]
+        out[i] = math.nan
+        if t <= 0.0 or price <= 0.0:
+            continue
+
+        lo, hi = 1e-6, 5.0
+        f_lo = _bs_call(S, K[i], t, r, lo, q) - price
+        f_hi = _bs_call(S, K[i], t, r, hi, q) - price
+        if f_lo == 0.0:
+            out[i] = lo
+            continue
+        if not f_lo * f_hi <= 0.0:
+            continue
+
+        # The call price is increasing in sigma, so keep the half whose ends still straddle the quote
+        while hi - lo > tol:
+            mid = 0.5 * (lo + hi)
+            f_mid = _bs_call(S, K[i], t, r, mid, q) - price
+            if f_mid * f_lo > 0.0:
+                lo, f_lo = mid, f_mid
+            else:
+                hi = mid
+
+        out[i] = 0.5 * (lo + hi)
+
+def implied_vol_bisect(prices, S, K, T, r, q=0, tol=1e-12):
+    """Calculate implied volatilities for arrays of call prices by compiled bisection, for rows Newton can't solve"""
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    K = np.ascontiguousarray(K, dtype=np.float64)
+    T = np.ascontiguousarray(T, dtype=np.float64)
+    out = np.empty(K.shape, dtype=np.float64)
+    _bisect_kernel(prices, float(S), K, T, float(r), float(q), out, tol)
+    return out
 
 def calculate_implied_volatility(options_df, spot_price, risk_free_rate, dividend_yield):
     """Calculate implied volatility for a DataFrame of options"""
-    options_df['impliedVolatility'] = options_df.apply(
-        lambda row: implied_volatility(
-            price=row['mid'],
-            S=spot_price,
-            K=row['strike'],
-            T=row['timeToExpiration'],
-            r=risk_free_rate,
-            q=dividend_yield
-        ), axis=1
-    )
-    
-    # Convert to percentage
-    options_df['impliedVolatility'] *= 100
-    
+    mids = options_df['mid'].to_numpy(dtype=np.float64)
+    strikes = options_df['strike'].to_numpy(dtype=np.float64)
+    times = options_df['timeToExpiration'].to_numpy(dtype=np.float64)
 
-    options_df['moneyness'] = options_df['strike'] / spot_price
+    # Solve every option at once in the compiled kernel instead of one solve per row
+    iv = implied_vol_jit(mids, spot_price, strikes, times, risk_free_rate, dividend_yield)
+
+    # Rows Newton gave up on get a bracketed solve, compiled so no Python runs per iteration
+    retry = np.isnan(iv) & (times > 0) & (mids > 0)
+    if retry.any():
+        iv[retry] = implied_vol_bisect(
+            mids[retry], spot_price, strikes[retry], times[retry], risk_free_rate, dividend_yield
+        )
+
+    # Convert to percentage in place, then write both derived columns in one step
+    iv *= 100
     
-    return options_df 
+    return options_df.assign(
+        impliedVolatility=iv,
+        moneyness=strikes / spot_price
+    )
 